@@ -0,0 +1,150 @@
+import os
+import re
+import signal
+from typing import Tuple
+import lxml.etree
+import lxml.html
+import html2text
+
+# Elements removed (together with their content) before markdown conversion
+_STRIP_ELEMENTS = (lxml.etree.Comment, "script", "style", "meta", "link", "noscript", "head")
+
+# Whitespace clean-up patterns used on converted output
+_RE_BLANKLINES = re.compile(r'\n{3,}')
+_RE_WS = re.compile(r'\s+')
+
+# Leading XML declaration (e.g. on XHTML pages), optionally preceded by a BOM
+_RE_XML_DECL = re.compile(r'^\ufeff?\s*<\?xml[^>]*\?>')
+
+def parse_html(html_content: str) -> lxml.html.HtmlElement:
+    """Parse decoded HTML with lxml, which rejects str input carrying an XML encoding declaration"""
+    return lxml.html.fromstring(_RE_XML_DECL.sub('', html_content, count=1))
+
+def feed_tree(h: html2text.HTML2Text, tree: lxml.html.HtmlElement) -> None:
+    """Replay an lxml tree as start tag / data / end tag events on an html2text converter"""
+    for event, element in lxml.etree.iterwalk(tree, events=("start", "end")):
+        if not isinstance(element.tag, str):
+            # Processing instructions and the like: only their tail text is content
+            if event == "end" and element.tail:
+                h.handle_data(element.tail)
+            continue
+        if event == "start":
+            h.handle_starttag(element.tag, element.items())
+            if element.text:
+                h.handle_data(element.text)
+        else:
+            h.handle_endtag(element.tag)
+            if element.tail:
+                h.handle_data(element.tail)
+
+def convert_html_to_markdown(html_content: str, content_type: str = "") -> str:
+    """
+    Convert HTML content to clean markdown format, removing scripts, styles, and unwanted elements
+    
+    Args:
+        html_content: Raw HTML content
+        content_type: Content-Type header to determine if it's HTML
+    
+    Returns:
+        Clean markdown content
+    """
+    # Only process if it's HTML content
+    if not content_type or "text/html" not in content_type.lower():
+        return html_content
+    
+    try:
+        # First, clean the HTML tree to remove scripts, styles, comments and other unwanted elements
+        tree = parse_html(html_content)
+        lxml.etree.strip_elements(tree, *_STRIP_ELEMENTS, with_tail=False)
+        
+        # Configure html2text converter
+        h = html2text.HTML2Text()
+        h.ignore_links = False  # Keep links as markdown links
+        h.ignore_images = False  # Keep images as markdown images
+        h.body_width = 0  # Don't wrap lines
+        h.ignore_emphasis = False  # Keep bold/italic formatting
+        h.ignore_tables = False  # Convert tables to markdown
+        h.single_line_break = False  # Use proper line breaks
+        h.mark_code = True  # Mark code blocks
+        h.wrap_links = False  # Don't wrap link URLs
+        h.unicode_snob = True  # Use unicode characters when possible
+        h.escape_snob = True  # Escape special markdown characters when needed
+        
+        # Convert HTML to markdown by feeding the cleaned tree straight into html2text,
+        # instead of serializing it and letting html2text parse it a second time
+        feed_tree(h, tree)
+        markdown_content = h.optwrap(h.finish())
+        
+        # Clean up the markdown output
+        # Remove excessive blank lines (more than 2 consecutive)
+        markdown_content = _RE_BLANKLINES.sub('\n\n', markdown_content)
+        
+        # Clean up leading/trailing whitespace
+        markdown_content = markdown_content.strip()
+        
+        return markdown_content
+        
+    except Exception as e:
+        # If conversion fails, fall back to basic text extraction
+        return extract_text(html_content)
+
+def extract_text(html_content: str) -> str:
+    """
+    Extract the plain text of an HTML document, used when markdown conversion fails or times out
+    
+    Args:
+        html_content: Raw HTML content
+    
+    Returns:
+        Plain text content, or the original content if it cannot be parsed
+    """
+    try:
+        # lxml's text_content() is a single C-level pass, so this stays cheap even on hostile pages
+        tree = parse_html(html_content)
+        lxml.etree.strip_elements(tree, *_STRIP_ELEMENTS, with_tail=False)
+        lines = [_RE_WS.sub(' ', line).strip() for line in tree.text_content().splitlines()]
+        return '\n'.join(line for line in lines if line)
+    except Exception:
+        return html_content
+
+
+class ConversionTimeout(BaseException):
+    """Raised inside a pool worker when a conversion exceeds its budget.
+    
+    Derives from BaseException so the converters' own ``except Exception`` fallbacks don't swallow it.
+    """
+
+def _raise_conversion_timeout(signum, frame):
+    raise ConversionTimeout()
+
+def convert_with_deadline(handler, html_content: str, content_type: str, timeout: float) -> Tuple[str, bool]:
+    """
+    Run handler in a pool worker under a wall-clock budget, falling back to plain text when it runs out
+    
+    The budget is enforced inside the worker with a SIGALRM timer, so it is measured from when
+    the conversion starts rather than from when it was queued.
+    
+    Args:
+        handler: Converter to run, e.g. convert_html_to_markdown
+        html_content: Raw HTML content
+        content_type: Content-Type of the response
+        timeout: Budget in seconds
+    
+    Returns:
+        Tuple of (content, converted): the converted content and True, or the page's plain
+        text and False if the budget ran out
+    """
+    signal.signal(signal.SIGALRM, _raise_conversion_timeout)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            result = handler(html_content, content_type)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        return result, True
+    except ConversionTimeout:
+        return extract_text(html_content), False
+
+def report_pid(pids) -> None:
+    """Pool worker initializer: tell the parent this worker's PID so a stuck worker can be killed"""
+    pids.put(os.getpid())
@@ -1,16 +1,43 @@
 from fastmcp import FastMCP
-import requests
+import aiohttp
+import asyncio
+import codecs
 import socket
+import ssl
+import signal
 import ipaddress
 import os
-from typing import Optional, Dict, Any, Tuple, List
-from urllib.parse import urlparse
-from requests.exceptions import RequestException
-from bs4 import BeautifulSoup
+import sys
+import threading
+import multiprocessing
+import time
+from functools import lru_cache
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, Tuple, List, FrozenSet, Union, AsyncIterator, Iterator
+from urllib.parse import SplitResult, urlsplit
+from cachetools import TLRUCache, TTLCache
+from email.utils import parsedate_to_datetime
 import re
-import html2text
+import charset_normalizer
+import convert
+from convert import convert_html_to_markdown, convert_with_deadline, extract_text
 
-mcp = FastMCP("Secure Fetch")
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Close the shared HTTP session and stop the conversion workers when the app shuts down"""
+    try:
+        yield
+    finally:
+        if _SESSION is not None:
+            await _SESSION.close()
+        for pool in list(_HTML_WORKER_PIDS):
+            _stop_html_pool(pool)
+
+mcp = FastMCP("Secure Fetch", lifespan=lifespan)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
 
 # Parse allowlist from environment variable
 def get_allowlist() -> List[str]:
@@ -18,112 +45,369 @@ def get_allowlist() -> List[str]:
     allowlist_env = os.environ.get("SECURE_FETCH_ALLOWLIST", "")
     if not allowlist_env:
         return []
-    return [item.strip() for item in allowlist_env.split(",")]
+    return [item.strip() for item in allowlist_env.split(",") if item.strip()]
+
+def normalize_hostname(hostname: str) -> str:
+    """Normalize a hostname for comparison: DNS names are case-insensitive and may carry a trailing dot"""
+    return hostname.lower().rstrip(".")
+
+def split_allowlist(allowlist: List[str]) -> Tuple[FrozenSet[str], Tuple[IPNetwork, ...]]:
+    """Split allowlist entries into hostnames (normalized for case-insensitive matching) and IP networks (single IPs or CIDR ranges)"""
+    hosts = set()
+    nets = []
+    for item in allowlist:
+        try:
+            nets.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            hosts.add(normalize_hostname(item))
+    return frozenset(hosts), tuple(nets)
 
 # Initialize allowlist
 ALLOWLIST = get_allowlist()
+ALLOW_HOSTS, ALLOW_NETS = split_allowlist(ALLOWLIST)
 
-def is_private_ip(ip: str, hostname: str = None) -> bool:
-    """Check if an IP address is private/internal and not in the allowlist"""
+# TLS context shared by every HTTPS connection, built once at import time.
+# Certificates are verified against the SNI hostname passed per request.
+_SSL_CONTEXT = ssl.create_default_context()
+_SSL_CONTEXT.set_alpn_protocols(["http/1.1"])
+
+# Shared HTTP session, created lazily inside the running event loop so that
+# keep-alive connections are reused across tool calls and redirect hops
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+# Most connections the shared session keeps open at once
+MAX_CONNECTIONS = 100
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use"""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=64, ssl=_SSL_CONTEXT)
+        )
+    return _SESSION
+
+@lru_cache(maxsize=4096)
+def _is_private_cached(ip: str, hostname: str) -> bool:
+    """Memoized private/allowlist check; the allowlist is fixed at import time"""
     try:
         # If the hostname or IP is in the allowlist, allow it
-        if hostname and hostname in ALLOWLIST:
+        if hostname and hostname in ALLOW_HOSTS:
             return False
-        if ip in ALLOWLIST:
+        ip_obj = ipaddress.ip_address(ip)
+        if any(ip_obj in net for net in ALLOW_NETS):
             return False
             
         # Otherwise, check if it's a private/internal IP
-        return ipaddress.ip_address(ip).is_private
+        return ip_obj.is_private
     except ValueError:
         return True  # If we can't parse it, consider it unsafe
 
-def resolve_domain(url: str) -> Tuple[str, str, str]:
+def is_private_ip(ip: str, hostname: str = None) -> bool:
+    """Check if an IP address is private/internal and not in the allowlist"""
+    return _is_private_cached(ip, normalize_hostname(hostname or ""))
+
+# DNS cache: successful lookups live for SECURE_FETCH_DNS_TTL seconds, failures for 60 seconds
+DNS_TTL = int(os.environ.get("SECURE_FETCH_DNS_TTL", "300"))
+_DNS_CACHE = TTLCache(maxsize=1024, ttl=DNS_TTL) if DNS_TTL > 0 else None
+_DNS_NEGATIVE_CACHE = TTLCache(maxsize=1024, ttl=60) if DNS_TTL > 0 else None
+_DNS_LOCK = threading.Lock()
+
+def _getaddrinfo(hostname: str) -> Tuple[str, ...]:
+    """Return every IPv4/IPv6 address the hostname resolves to, in resolver order"""
+    infos = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM, flags=socket.AI_ADDRCONFIG)
+    return tuple(dict.fromkeys(sockaddr[0] for _, _, _, _, sockaddr in infos))
+
+def _cached_resolve(hostname: str) -> Tuple[str, ...]:
+    """Resolve hostname to its IPs, caching both answers and resolution failures"""
+    if _DNS_CACHE is None:
+        return _getaddrinfo(hostname)
+    with _DNS_LOCK:
+        addresses = _DNS_CACHE.get(hostname)
+        if addresses is not None:
+            return addresses
+        if hostname in _DNS_NEGATIVE_CACHE:
+            raise socket.gaierror(f"Could not resolve hostname: {hostname}")
+    try:
+        addresses = _getaddrinfo(hostname)
+    except socket.gaierror:
+        with _DNS_LOCK:
+            _DNS_NEGATIVE_CACHE[hostname] = True
+        raise
+    with _DNS_LOCK:
+        _DNS_CACHE[hostname] = addresses
+    return addresses
+
+def resolve_domain(url: str) -> Tuple[str, str, SplitResult]:
     """
-    Resolve domain to IP and return the IP, original host, and scheme
+    Resolve domain to IP and return the IP, original host, and the parsed URL
+    
+    Every address the hostname resolves to must pass the private IP check, so a
+    name with both public and private records cannot be used to reach internal hosts.
     """
-    parsed_url = urlparse(url)
-    hostname = parsed_url.netloc.split(':')[0]
-    scheme = parsed_url.scheme
+    parts = urlsplit(url)
+    hostname = parts.hostname
+    if not hostname:
+        raise ValueError(f"URL '{url}' has no hostname")
     try:
-        ip = socket.gethostbyname(hostname)
-        if is_private_ip(ip, hostname):
-            raise ValueError(f"IP {ip} is private/internal and not allowed")
-        return ip, hostname, scheme
+        # Literal IPs need no lookup
+        try:
+            addresses = (str(ipaddress.ip_address(hostname)),)
+        except ValueError:
+            addresses = _cached_resolve(hostname)
+        for ip in addresses:
+            if is_private_ip(ip, hostname):
+                raise ValueError(f"IP {ip} is private/internal and not allowed")
+        return addresses[0], hostname, parts
     except socket.gaierror:
         raise ValueError(f"Could not resolve hostname: {hostname}")
 
-def convert_html_to_markdown(html_content: str, content_type: str = "") -> str:
+# Largest response body (after decompression) that will be read
+MAX_BYTES = int(os.environ.get("SECURE_FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+
+async def read_body(response: aiohttp.ClientResponse) -> str:
     """
-    Convert HTML content to clean markdown format, removing scripts, styles, and unwanted elements
+    Stream the response body, aborting once it grows beyond MAX_BYTES, and decode it once
     
     Args:
-        html_content: Raw HTML content
-        content_type: Content-Type header to determine if it's HTML
+        response: The response whose body should be read
     
     Returns:
-        Clean markdown content
+        The decoded response body
     """
-    # Only process if it's HTML content
-    if not content_type or "text/html" not in content_type.lower():
-        return html_content
+    # These responses have no body, whatever their Content-Length says
+    if response.method == "HEAD" or response.status in (204, 304):
+        return ""
     
+    if response.content_length is not None and response.content_length > MAX_BYTES:
+        raise ValueError(f"Response body exceeds the {MAX_BYTES} byte limit")
+    
+    chunks = []
+    total = 0
+    async for chunk in response.content.iter_chunked(65536):
+        total += len(chunk)
+        if total > MAX_BYTES:
+            raise ValueError(f"Response body exceeds the {MAX_BYTES} byte limit")
+        chunks.append(chunk)
+    return decode_body(b"".join(chunks), response.headers.get('content-type', ''))
+
+_RE_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+_RE_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+def _lookup_charset(charset: Optional[str]) -> Optional[str]:
+    """Return the codec name for a declared charset, or None if it is unknown"""
+    if not charset:
+        return None
     try:
-        # First, clean the HTML with BeautifulSoup to remove unwanted elements
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # Remove script, style, and other unwanted elements
-        for element in soup(["script", "style", "meta", "link", "noscript", "head"]):
-            element.decompose()
-        
-        # Remove comments
-        for comment in soup.find_all(string=lambda text: isinstance(text, soup.__class__.__bases__[0])):
-            if hasattr(comment, 'extract'):
-                comment.extract()
-        
-        # Get the cleaned HTML
-        cleaned_html = str(soup)
-        
-        # Configure html2text converter
-        h = html2text.HTML2Text()
-        h.ignore_links = False  # Keep links as markdown links
-        h.ignore_images = False  # Keep images as markdown images
-        h.body_width = 0  # Don't wrap lines
-        h.ignore_emphasis = False  # Keep bold/italic formatting
-        h.ignore_tables = False  # Convert tables to markdown
-        h.single_line_break = False  # Use proper line breaks
-        h.mark_code = True  # Mark code blocks
-        h.wrap_links = False  # Don't wrap link URLs
-        h.unicode_snob = True  # Use unicode characters when possible
-        h.escape_snob = True  # Escape special markdown characters when needed
-        
-        # Convert HTML to markdown
-        markdown_content = h.handle(cleaned_html)
-        
-        # Clean up the markdown output
-        # Remove excessive blank lines (more than 2 consecutive)
-        markdown_content = re.sub(r'\n{3,}', '\n\n', markdown_content)
-        
-        # Clean up leading/trailing whitespace
-        markdown_content = markdown_content.strip()
-        
-        return markdown_content
-        
-    except Exception as e:
-        # If conversion fails, fall back to basic text extraction
+        return codecs.lookup(charset).name
+    except LookupError:
+        return None
+
+def decode_body(body: bytes, content_type: str) -> str:
+    """
+    Decode a response body, only running charset detection when no usable charset is declared
+    
+    Args:
+        body: Raw response body
+        content_type: Content-Type header of the response
+    
+    Returns:
+        The decoded body
+    """
+    # Charset from the Content-Type header
+    match = _RE_CHARSET.search(content_type)
+    charset = _lookup_charset(match.group(1) if match else None)
+    
+    # Charset from a <meta> tag near the start of an HTML document
+    if charset is None and "html" in content_type.lower():
+        match = _RE_META_CHARSET.search(body, 0, 1024)
+        charset = _lookup_charset(match.group(1).decode("ascii") if match else None)
+    
+    if charset is not None:
+        return body.decode(charset, errors="replace")
+    
+    # Nothing declared: most content is UTF-8, so only detect when that fails
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        best = charset_normalizer.from_bytes(body).best()
+        return str(best) if best is not None else body.decode("utf-8", errors="replace")
+
+# In-memory cache of fetch results, bounded by the total size of cached content in characters.
+# Entries expire according to the response's Cache-Control max-age / Expires headers;
+# responses without explicit freshness information are never cached.
+CACHE_BYTES = int(os.environ.get("SECURE_FETCH_CACHE_BYTES", str(64 * 1024 * 1024)))
+_RESPONSE_CACHE = TLRUCache(
+    maxsize=CACHE_BYTES,
+    ttu=lambda key, value, now: now + value[0],
+    getsizeof=lambda value: len(value[1]["content"]) + 1
+) if CACHE_BYTES > 0 else None
+
+_RE_MAX_AGE = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?')
+
+def cache_ttl(response_headers) -> int:
+    """
+    Work out how many seconds a response may be cached for
+    
+    Args:
+        response_headers: Headers of the response
+    
+    Returns:
+        Freshness lifetime in seconds, 0 if the response must not be cached
+    """
+    cache_control = response_headers.get('Cache-Control', '').lower()
+    if any(directive in cache_control for directive in ("no-store", "no-cache", "private")):
+        return 0
+    
+    # Freshness lifetime: max-age, or Expires relative to the response's Date
+    match = _RE_MAX_AGE.search(cache_control)
+    expires = response_headers.get('Expires')
+    if match:
+        lifetime = int(match.group(1))
+    elif expires:
+        try:
+            date = response_headers.get('Date')
+            date_ts = parsedate_to_datetime(date).timestamp() if date else time.time()
+            lifetime = int(parsedate_to_datetime(expires).timestamp() - date_ts)
+        except (TypeError, ValueError):
+            return 0
+    else:
+        return 0
+    
+    # Time the response already spent in upstream caches (e.g. a CDN) counts against its lifetime
+    age = response_headers.get('Age', '').strip()
+    if age.isdigit():
+        lifetime -= int(age)
+    return max(0, lifetime)
+
+# Converters applied to HTML responses for each supported output_format (None keeps the HTML as-is)
+_OUTPUT_HANDLERS = {
+    "markdown": convert_html_to_markdown,
+    "html": None
+}
+
+# Wall-clock budget in seconds for converting one page before falling back to plain text
+CONVERT_TIMEOUT = float(os.environ.get("SECURE_FETCH_CONVERT_TIMEOUT", "5.0"))
+
+# Extra time a worker gets past CONVERT_TIMEOUT (e.g. to start up, or to produce the plain-text
+# fallback) before it is considered stuck and the pool is retired
+_HTML_KILL_GRACE = 5.0
+
+# HTML to markdown conversion is CPU-bound, so it runs in worker processes to keep the
+# event loop (and the GIL) free for other tool calls. Spawned rather than forked, as the
+# server process already runs threads.
+_HTML_WORKERS = os.cpu_count() or 1
+
+# PIDs reported by the workers of each live pool, so stuck workers can be killed at shutdown
+_HTML_WORKER_PIDS: Dict[ProcessPoolExecutor, Any] = {}
+
+def _new_html_pool() -> ProcessPoolExecutor:
+    """Create the worker pool used for HTML to markdown conversion"""
+    context = multiprocessing.get_context("spawn")
+    pids = context.SimpleQueue()
+    pool = ProcessPoolExecutor(
+        max_workers=_HTML_WORKERS,
+        mp_context=context,
+        initializer=convert.report_pid,
+        initargs=(pids,)
+    )
+    _HTML_WORKER_PIDS[pool] = pids
+    return pool
+
+def _stop_html_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut pool down, killing its workers first as shutdown() alone leaves a stuck one running"""
+    pids = _HTML_WORKER_PIDS.pop(pool, None)
+    if pids is None:
+        return
+    while not pids.empty():
+        try:
+            os.kill(pids.get(), signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@contextmanager
+def _convert_as_main() -> Iterator[None]:
+    """
+    Stand convert in for the main module while pool workers are being started
+    
+    A spawned worker re-runs the parent's main module before taking tasks, which for this
+    script means importing fastmcp and building a second server in every worker. The
+    converters only need convert, so that is all the workers get to import.
+    """
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = convert
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+_HTML_POOL = _new_html_pool()
+
+# Pages wait here rather than in the pool's queue, so a submitted task starts right away
+# and the hard deadline below only covers its run time
+_HTML_SLOTS = asyncio.Semaphore(_HTML_WORKERS)
+
+def _replace_html_pool(pool: ProcessPoolExecutor, broken: bool) -> None:
+    """Swap in a fresh conversion pool after a worker of pool died or got stuck"""
+    global _HTML_POOL
+    if _HTML_POOL is pool:
+        _HTML_POOL = _new_html_pool()
+        if broken:
+            _stop_html_pool(pool)
+        else:
+            # Killing the stuck worker now would break the pool and fail the other conversions
+            # still running in it. Those all finish within one hard deadline, so stop it after that.
+            asyncio.get_running_loop().call_later(CONVERT_TIMEOUT + _HTML_KILL_GRACE, _stop_html_pool, pool)
+
+async def _run_in_html_pool(fn, *args):
+    """Run fn in the conversion pool with a hard deadline, recycling the pool if a worker hangs or dies"""
+    pool = _HTML_POOL
+    loop = asyncio.get_running_loop()
+    try:
+        # Workers are started on demand by submit(), i.e. by run_in_executor itself. It also
+        # raises BrokenProcessPool straight away if a worker died while the pool was idle.
+        with _convert_as_main():
+            future = loop.run_in_executor(pool, fn, *args)
+        return await asyncio.wait_for(
+            future,
+            timeout=CONVERT_TIMEOUT + _HTML_KILL_GRACE
+        )
+    except asyncio.TimeoutError:
+        _replace_html_pool(pool, broken=False)
+        raise
+    except BrokenProcessPool:
+        _replace_html_pool(pool, broken=True)
+        raise
+
+async def convert_in_pool(handler, html_content: str, content_type: str, output_type: str) -> Tuple[str, str]:
+    """
+    Convert a page in the worker pool without letting a slow or crashing page stall other conversions
+    
+    Args:
+        handler: Converter to run, e.g. convert_html_to_markdown
+        html_content: Raw HTML content
+        content_type: Content-Type of the response
+        output_type: Output type of a successful conversion, e.g. "markdown"
+    
+    Returns:
+        Tuple of (content, output_type): the converted content and output_type, the page's
+        plain text and "text/plain" if conversion timed out or its worker died, or the
+        original content and "html" if even that failed
+    """
+    async with _HTML_SLOTS:
         try:
-            soup = BeautifulSoup(html_content, 'lxml')
-            for script in soup(["script", "style", "meta", "link", "noscript"]):
-                script.decompose()
-            text = soup.get_text()
-            text = re.sub(r'\s+', ' ', text)
-            lines = [line.strip() for line in text.splitlines()]
-            clean_lines = [line for line in lines if line]
-            return '\n'.join(clean_lines)
-        except:
-            return html_content
+            content, converted = await _run_in_html_pool(convert_with_deadline, handler, html_content, content_type, CONVERT_TIMEOUT)
+            return content, output_type if converted else "text/plain"
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            pass
+        try:
+            return await _run_in_html_pool(extract_text, html_content), "text/plain"
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            return html_content, "html"
 
 @mcp.tool()
-def fetch_url(url: str, method: str = "GET", headers: Optional[Dict[str, str]] = None, output_format: str = "markdown") -> Dict[str, Any]:
+async def fetch_url(url: str, method: str = "GET", headers: Optional[Dict[str, str]] = None, output_format: str = "markdown") -> Dict[str, Any]:
     """
     Fetch a URL and return response details
     
@@ -141,69 +425,75 @@ def fetch_url(url: str, method: str = "GET", headers: Optional[Dict[str, str]] =
         headers = {}
     
     # Validate output_format parameter
-    if output_format not in ["markdown", "html"]:
+    if output_format not in _OUTPUT_HANDLERS:
         return {
             "status_code": 400,
             "content": f"Invalid output_format '{output_format}'. Must be 'markdown' or 'html'.",
             "output_type": "error"
         }
     
+    # Serve idempotent GETs from the response cache when a fresh entry exists
+    cache_key = None
+    if _RESPONSE_CACHE is not None and method.upper() == "GET":
+        cache_key = (url, output_format, frozenset(headers.items()))
+        cached = _RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            return dict(cached[1])
+    
     try:
         # Track redirects
         redirect_count = 0
         max_redirects = 3
         current_url = url
         
+        # Copy the caller's headers once; only Host changes between hops
+        request_headers = dict(headers)
+        
         while redirect_count <= max_redirects:
             # Resolve domain to IP and validate
-            ip, hostname, scheme = resolve_domain(current_url)
+            ip, hostname, parts = await asyncio.to_thread(resolve_domain, current_url)
+            scheme = parts.scheme
 
             # Ensure scheme is either http or https
             if scheme.lower() not in ["http", "https"]:
                 raise ValueError(f"Scheme '{scheme}' is not allowed. Only http and https are permitted.")
             
             
-            # Rebuild URL with IP but maintain path and query
-            parsed_url = urlparse(current_url)
-            port = f":{parsed_url.port}" if parsed_url.port else ""
-            path = parsed_url.path if parsed_url.path else ""
-            query = f"?{parsed_url.query}" if parsed_url.query else ""
-            ip_url = f"{scheme}://{ip}{port}{path}{query}"
+            # Rebuild URL with IP but maintain port, path and query
+            ip_netloc = f"[{ip}]" if ":" in ip else ip
+            if parts.port:
+                ip_netloc += f":{parts.port}"
+            ip_url = parts._replace(netloc=ip_netloc, fragment="").geturl()
             
             # Set Host header to original hostname
-            request_headers = headers.copy()
             request_headers['Host'] = hostname
             
-            # Create a session to set SNI parameters for HTTPS
-            session = requests.Session()
-            if scheme.lower() == "https":
-                # Set SNI to match the hostname for HTTPS connections
-                session.get_adapter('https://').poolmanager.connection_pool_kw['server_hostname'] = hostname
-                session.get_adapter('https://').poolmanager.connection_pool_kw['assert_hostname'] = hostname
-            
-            # Make request with redirect disabled
-            response = session.request(
-                method=method, 
-                url=ip_url, 
+            # Make request with redirect disabled, setting SNI to match the hostname for HTTPS connections
+            async with get_session().request(
+                method=method,
+                url=ip_url,
                 headers=request_headers,
-                allow_redirects=False
-            )
+                allow_redirects=False,
+                server_hostname=hostname if scheme.lower() == "https" else None
+            ) as response:
+                status_code = response.status
+                response_headers = response.headers
+                response_body = await read_body(response)
             
             # Check if it's a redirect
-            if 300 <= response.status_code < 400:
+            if 300 <= status_code < 400:
                 redirect_count += 1
                 if redirect_count > max_redirects:
                     break
                 
                 # Get the redirect URL
-                redirect_url = response.headers.get('Location')
+                redirect_url = response_headers.get('Location')
                 if not redirect_url:
                     break
                 
                 # Handle relative redirects
                 if not redirect_url.startswith(('http://', 'https://')):
-                    parsed_original = urlparse(current_url)
-                    base = f"{parsed_original.scheme}://{parsed_original.netloc}"
+                    base = f"{parts.scheme}://{parts.netloc}"
                     redirect_url = base + redirect_url if redirect_url.startswith('/') else redirect_url
                 
                 current_url = redirect_url
@@ -213,53 +503,114 @@ def fetch_url(url: str, method: str = "GET", headers: Optional[Dict[str, str]] =
                 break
         
         # Get response content
-        response_body = response.text
-        original_content_type = response.headers.get('content-type', '')
+        original_content_type = response_headers.get('content-type', '')
+        mime_type = original_content_type.split(';', 1)[0].strip().lower()
         
         # Determine output type and process content accordingly
-        if output_format == "markdown" and "text/html" in original_content_type.lower():
-            # Convert HTML to markdown
-            processed_content = convert_html_to_markdown(response_body, original_content_type)
-            output_type = "markdown"
+        if mime_type == "text/html":
+            # Convert HTML to markdown or keep it as-is, depending on output_format
+            handler = _OUTPUT_HANDLERS[output_format]
+            if handler is None:
+                processed_content, output_type = response_body, output_format
+            else:
+                processed_content, output_type = await convert_in_pool(handler, response_body, mime_type, output_format)
         else:
-            # Keep original content (HTML or other formats)
+            # Keep original content for other formats
             processed_content = response_body
-            if "text/html" in original_content_type.lower():
-                output_type = "html"
-            else:
-                output_type = original_content_type.split(';')[0] if original_content_type else "text/plain"
+            output_type = mime_type or "text/plain"
         
-        return {
-            "status_code": response.status_code,
+        result = {
+            "status_code": status_code,
             "content": processed_content,
             "redirect_count": redirect_count,
             "final_url": current_url,
             "original_content_type": original_content_type,
             "output_type": output_type
         }
+        
+        # Only direct responses are cached: the final hop's freshness says nothing about how
+        # long the redirects leading to it stay valid. Neither are fallbacks for a conversion
+        # that timed out or crashed, so the page gets converted again next time.
+        degraded = mime_type == "text/html" and output_type != output_format
+        if cache_key is not None and status_code == 200 and redirect_count == 0 and not degraded:
+            ttl = cache_ttl(response_headers)
+            if ttl > 0 and len(processed_content) < CACHE_BYTES:
+                _RESPONSE_CACHE[cache_key] = (ttl, dict(result))
+        
+        return result
     except ValueError as e:
         return {
             "status_code": 403,
             "content": str(e),
             "output_type": "error"
         }
-    except RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         return {
             "status_code": 0,
             "content": str(e),
             "output_type": "error"
         }
 
+# Most URLs a single fetch_urls call may ask for
+MAX_BATCH = int(os.environ.get("SECURE_FETCH_MAX_BATCH", "100"))
+
+@mcp.tool()
+async def fetch_urls(urls: List[str], method: str = "GET", headers: Optional[Dict[str, str]] = None, output_format: str = "markdown", concurrency: int = 16) -> List[Dict[str, Any]]:
+    """
+    Fetch several URLs concurrently and return the response details for each
+    
+    Args:
+        urls: The URLs to fetch
+        method: HTTP method to use (default: GET)
+        headers: Optional HTTP headers sent with every request
+        output_format: Output format - "markdown" to convert HTML to markdown, "html" to keep original HTML (default: "markdown")
+        concurrency: Maximum number of requests in flight at once (default: 16, at most 100)
+    
+    Returns:
+        List of fetch_url result dictionaries, in the same order as urls
+    """
+    if len(urls) > MAX_BATCH:
+        return [{
+            "status_code": 400,
+            "content": f"Too many URLs ({len(urls)}). At most {MAX_BATCH} can be fetched in one call.",
+            "output_type": "error"
+        }]
+    
+    # More requests than the connector allows would only queue up for a connection
+    semaphore = asyncio.Semaphore(min(max(1, concurrency), MAX_CONNECTIONS))
+    
+    async def fetch_one(url: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch_url(url, method, headers, output_format)
+    
+    results = await asyncio.gather(*[fetch_one(url) for url in urls], return_exceptions=True)
+    return [
+        {"status_code": 0, "content": str(result), "output_type": "error"}
+        if isinstance(result, Exception) else result
+        for result in results
+    ]
+
+# Create HTTP app with JSON responses and stateless operation
+app = mcp.http_app(
+    json_response=True,
+    stateless_http=True,
+    transport="streamable-http"
+)
+
 if __name__ == "__main__":
     import uvicorn
     
-    # Create HTTP app with JSON responses and stateless operation
-    app = mcp.http_app(
-        json_response=True,
-        stateless_http=True,
-        transport="streamable-http"
-    )
+    # One async worker by default; markdown conversion already spreads across cores via _HTML_POOL.
+    # Extra workers are separate processes with their own caches and conversion pool.
+    workers = int(os.environ.get("SECURE_FETCH_WORKERS", "1"))
     
-    # Run with uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
+    # Run with uvicorn on the C-backed uvloop event loop and httptools HTTP parser
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        access_log=False
+    )